@@ -0,0 +1,29 @@
+"""Reproject Vectors"""
+
+__author__ = "Ryan Milia"
+
+""" Date: August 31, 2026
+    Description:
+    This module reprojects the GeoNOVA mask datasets once, offline.
+    - Reads the county and water shapefiles.
+    - Reprojects them to the Sentinel-2 CRS (EPSG:32619).
+    - Saves them as GeoPackages that 2-masking_water.py reads directly,
+      keeping pyproj out of every production run.
+"""
+import geopandas as gpd
+
+# File paths
+lake_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\water\WA_POLY_10K.shp'
+county_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\county\County_Polygons.shp'
+lake_32619_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\water_32619.gpkg'
+county_32619_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\county_32619.gpkg'
+
+if __name__ == '__main__':
+
+    # Reproject the county polygons to the raster CRS
+    gpd.read_file(county_filename).to_crs(32619).to_file(county_32619_filename, driver='GPKG')
+    print(f"Reprojected county polygons saved to {county_32619_filename}")
+
+    # Reproject the water polygons to the raster CRS
+    gpd.read_file(lake_filename).to_crs(32619).to_file(lake_32619_filename, driver='GPKG')
+    print(f"Reprojected water polygons saved to {lake_32619_filename}")
@@ -10,11 +10,13 @@ __author__ = "Ryan Milia"
     - Prints a masked burn severity map.
 """
 
+import os
+
 import rasterio
-from rasterio.io import MemoryFile
-import rasterio.mask
-import shapely.ops
-import pyproj
+import rasterio.features
+import shapely
+import shapely.geometry
+import geopandas as gpd
 import fiona
 
 # Filters features from the dataset
@@ -23,70 +25,108 @@ def filter_features(property: str, value: str, dataset):
 
 # Applies a coordination operation to features
 def transform_features(features, from_crs, to_crs):
-    transform = pyproj.Transformer.from_crs(from_crs,
-                                            to_crs,
-                                            always_xy=True).transform
-    output_features = []
-    for f in features:
-        output_features.append(shapely.ops.transform(transform,
-                                                     shapely.geometry.shape(f.geometry)))
-    return output_features
-
-# Applies a mask to the bands
-def apply_mask(band, features, invert=False):
-    with MemoryFile() as memfile:
-        with rasterio.open(memfile,
-                           mode='w',
-                           **profile) as temp:
-            temp.write(band)
-        with rasterio.open(memfile) as temp:
-            result, _ = rasterio.mask.mask(temp,
-                                           features,
-                                           invert=invert,
-                                           filled=True)
-    return result
+    # GeoSeries.to_crs reprojects the whole set through pyproj's batched
+    # C API, with no per-geometry Python callback at all
+    geometries = gpd.GeoSeries([shapely.geometry.shape(f.geometry) for f in features],
+                               crs=from_crs)
+    return geometries.to_crs(to_crs).tolist()
+
+# File paths
+lake_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\water\WA_POLY_10K.shp'
+county_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\county\County_Polygons.shp'
+mask_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\water_mask.tif'
+
+# Preprojected copies written by 0-reproject_vectors.py
+lake_32619_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\water_32619.gpkg'
+county_32619_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\county_32619.gpkg'
+
+# Loads mask features, preferring the preprojected GeoPackage when present
+def load_features(preprojected_filename, filename, property: str, values, to_crs):
+    if os.path.exists(preprojected_filename):
+        # Already in the raster CRS (see 0-reproject_vectors.py), so no
+        # reprojection is needed at run time
+        features = gpd.read_file(preprojected_filename)
+        return features[features[property].isin(values)].geometry.tolist()
+    # Fall back to the original shapefile and reproject on the fly
+    with fiona.open(filename) as dataset:
+        selected = []
+        for value in values:
+            selected.extend(filter_features(property, value, dataset))
+        return transform_features(selected, dataset.crs, to_crs)
+
+# Builds the combined water mask for the raster
+def build_mask(profile):
+    """Build a uint8 raster mask of the pixels to keep (county minus water)"""
+    out_shape = (profile['height'], profile['width'])
+
+    # Reuse the cached mask raster when it matches the grid
+    if os.path.exists(mask_filename):
+        with rasterio.open(mask_filename) as cached:
+            if cached.shape == out_shape and cached.transform == profile['transform']:
+                return cached.read(1)
+
+    # Get the CRS of the image
+    burn_severity_crs = profile['crs']
+    # The GeoNOVA county dataset, used to mask out the ocean
+    mask_county = load_features(county_32619_filename,
+                                county_filename,
+                                'NAME',
+                                ['Shelburne'],
+                                burn_severity_crs)
+    # The GeoNOVA dataset used to mask the lakes
+    mask_lakes = load_features(lake_32619_filename,
+                               lake_filename,
+                               'FEAT_DESC',
+                               ['Lake Water polygon', 'Coast River Water polygon'],
+                               burn_severity_crs)
+
+    # Rasterize the county-minus-water geometry in one pass; 1 = keep
+    combined = shapely.unary_union(mask_county).difference(shapely.unary_union(mask_lakes))
+    mask_array = rasterio.features.rasterize([(combined, 1)],
+                                             out_shape=out_shape,
+                                             transform=profile['transform'],
+                                             dtype='uint8')
+
+    # Cache the mask raster so reruns skip the rasterization entirely
+    mask_profile = dict(profile, dtype='uint8', count=1, nodata=None)
+    with rasterio.open(mask_filename, mode='w', **mask_profile) as output:
+        output.write(mask_array, 1)
+
+    return mask_array
+
+# Masks water out of the burn severity band
+def run(delta_nbr, profile):
+    """Mask the ocean and lakes out of the burn severity band, returns the masked band"""
+    mask_array = build_mask(profile)
+    masked = delta_nbr.copy()
+    masked[..., mask_array == 0] = profile.get('nodata') or 0
+    return masked
 
 if __name__ == '__main__':
 
     # File paths
-    lake_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\water\WA_POLY_10K.shp'  
-    county_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\county\County_Polygons.shp'
-    input_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\burn_severity.tif'  
+    input_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\burn_severity.tif'
     output_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\masked_burn_severity.tif'
 
     with rasterio.open(input_filename) as burn_severity:
-        # Get the CRS of the image
-        burn_severity_crs = burn_severity.crs
         # Get the profile of the burn severity dataset
         profile = burn_severity.profile
-        # Open the GeoNOVA county dataset. This dataset will be used to mask out the ocean.
-        with fiona.open(county_filename) as county:
-            # Filter out Nova Scotia
-            shelburne = filter_features('NAME',
-                                        'Shelburne',
-                                        county)
-            mask_county = transform_features(shelburne,
-                                             county.crs,
-                                             burn_severity_crs)
-        # Open the GeoNOVA dataset used to mask the lakes.
-        with fiona.open(lake_filename) as lake:
-            # Get the geometry for masking
-            lakes = filter_features('FEAT_DESC',
-                                    'Lake Water polygon',
-                                    lake)
-            lakes.extend(filter_features('FEAT_DESC',
-                                         'Coast River Water polygon',
-                                         lake))
-            mask_lakes = transform_features(lakes, lake.crs, burn_severity_crs)
-        # Mask the burn severity band with the province boundary
-        masked = apply_mask(burn_severity.read(), mask_county)
-        # Mask the result with the lakes
-        masked = apply_mask(masked, mask_lakes, invert=True)
+        # Keep the ΔNBR quantization scale for the output
+        scales = burn_severity.scales
+        # Mask the burn severity band
+        masked = run(burn_severity.read(), profile)
+
+    # Tiled ZSTD layout: smaller on disk, faster to decode than LZW, and
+    # windowed reads only touch the tiles they need
+    profile.update(tiled=True, blockxsize=512, blockysize=512,
+                   compress='ZSTD', zstd_level=1, predictor=2,
+                   num_threads='ALL_CPUS')
 
     # Write the mask result to a new file (not overwriting the original)
     with rasterio.open(output_filename,
                        mode='w',
                        **profile) as output:
+        output.scales = scales
         output.write(masked)
 
     print(f"Masked burn severity map saved to {output_filename}")
\ No newline at end of file
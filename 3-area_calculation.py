@@ -18,97 +18,159 @@ import numpy
 import rasterio
 import matplotlib.pyplot as plt
 
-# Calculate the area of burn severity levels within a specified range
-def area(low: float, high: float, array, label):
-    area = numpy.logical_and(
-            (low <= array), (array <= high)).sum() * (10 * 10) / 10000  # Convert to hectares
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional - a NumPy fallback is used below
+    njit = None
+
+if njit is not None:
+    # Count the pixels falling in each severity range in a single pass
+    # The explicit signature compiles at import so cache=True can reuse the
+    # LLVM output across runs instead of paying the JIT warmup every time
+    @njit('i8[:](i2[:,:], i2[:,:])', parallel=True, cache=True)
+    def _bin_counts(array, edges):
+        """Count pixels per (low, high) range without allocating bool masks"""
+        counts = numpy.zeros(edges.shape[0], numpy.int64)
+        for i in prange(array.shape[0]):
+            local = numpy.zeros(edges.shape[0], numpy.int64)
+            for j in range(array.shape[1]):
+                value = array[i, j]
+                for k in range(edges.shape[0]):
+                    if edges[k, 0] <= value <= edges[k, 1]:
+                        local[k] += 1
+            counts += local
+        return counts
+else:
+    # Pure NumPy fallback: one sort of the flat data, then every inclusive
+    # (low, high) count comes from searchsorted index arithmetic
+    def _bin_counts(array, edges):
+        """Count pixels per (low, high) range without allocating bool masks"""
+        ordered = numpy.sort(array, axis=None)
+        lower = numpy.searchsorted(ordered, edges[:, 0], side='left')
+        upper = numpy.searchsorted(ordered, edges[:, 1], side='right')
+        return (upper - lower).astype(numpy.int64)
+
+# Calculate the area of a burn severity level from its pixel count
+def area(count, label):
+    area = count * (10 * 10) / 10000  # Convert to hectares
     print(f'{label}: {area} hectares')
     return area
 
 # Function to plot the area bar chart
 def plot_bar_chart(severity_levels, areas):
-    plt.figure(figsize=(10, 6))
+    fig = plt.figure(figsize=(10, 6))
     plt.bar(severity_levels, areas, color=['blue', 'green', 'yellow', 'red'])
     plt.xlabel('Burn Severity Levels')
     plt.ylabel('Area (hectares)')
     plt.title('Area of Each Burn Severity Level')
     plt.tight_layout()
-    plt.show()
+    return fig
 
 # Function to plot the histogram of burn severity pixel values
-def plot_histogram(data):
-    plt.figure(figsize=(10, 6))
-    plt.hist(data.flatten(), bins=50, color='gray', edgecolor='black')
+def plot_histogram(counts, edges):
+    fig = plt.figure(figsize=(10, 6))
+    plt.stairs(counts, edges, fill=True, color='gray', edgecolor='black')
     plt.xlabel('Pixel Value')
     plt.ylabel('Frequency')
     plt.title('Histogram of Burn Severity Pixel Values')
     plt.tight_layout()
-    plt.show()
+    return fig
+
+# Summarize each severity range with the five boxplot statistics
+def boxplot_stats(data, severity_ranges, labels):
+    """Build the per-range statistics dictionaries used by Axes.bxp"""
+    stats = []
+    for (low, high), label in zip(severity_ranges, labels):
+        values = data[(data >= low) & (data <= high)]
+        if values.size == 0:
+            # Keep the slot with an empty box, as plt.boxplot did
+            stats.append({'label': label, 'med': numpy.nan, 'q1': numpy.nan,
+                          'q3': numpy.nan, 'whislo': numpy.nan,
+                          'whishi': numpy.nan, 'fliers': []})
+            continue
+        q1, med, q3 = numpy.percentile(values, [25, 50, 75])
+        # Standard 1.5 IQR whiskers, clipped to the data
+        iqr = q3 - q1
+        whislo = values[values >= q1 - 1.5 * iqr].min()
+        whishi = values[values <= q3 + 1.5 * iqr].max()
+        # Scale the statistics back to ΔNBR units for the plot
+        stats.append({'label': label,
+                      'med': med / DNBR_SCALE,
+                      'q1': q1 / DNBR_SCALE,
+                      'q3': q3 / DNBR_SCALE,
+                      'whislo': whislo / DNBR_SCALE,
+                      'whishi': whishi / DNBR_SCALE,
+                      'fliers': []})
+    return stats
 
 # Function to plot the boxplot for burn severity ranges
-def plot_boxplot(data, severity_ranges):
-    plt.figure(figsize=(10, 6))
-    plt.boxplot([data[(data >= low) & (data <= high)].flatten() for low, high in severity_ranges],
-                labels=['Low', 'Moderate-low', 'Moderate-high', 'High'])
+def plot_boxplot(stats):
+    fig = plt.figure(figsize=(10, 6))
+    plt.gca().bxp(stats, showfliers=False)
     plt.xlabel('Burn Severity Levels')
     plt.ylabel('Pixel Value')
     plt.title('Boxplot of Burn Severity Pixel Values by Severity Level')
     plt.tight_layout()
-    plt.show()
+    return fig
+
+# ΔNBR is stored as int16 scaled by 10000 (see 1-burn_severity.py)
+DNBR_SCALE = 10000.0
+
+# Severity ranges based on burn severity levels, in scaled int16 units
+severity_ranges = [(1000, 2690), (2700, 4390), (4400, 6590), (6600, 13000)]
 
-input_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\masked_burn_severity.tif' 
+# Calculates and plots the area of each burn severity level
+def run(data, counts=None):
+    """Calculate the burn severity areas and produce the graphs"""
+    # Count pixels per severity range in one traversal of the raster,
+    # unless the caller already accumulated the counts strip by strip
+    if counts is None:
+        counts = _bin_counts(data, numpy.array(severity_ranges, dtype=data.dtype))
 
-# Open the masked burn severity raster file
-with rasterio.open(input_filename) as burn_severity:
-    # Read data from the burn severity raster
-    data = burn_severity.read(1)
-    
     # Calculate areas for each severity range
-    low_area = area(0.1, 0.269, data, 'Low severity')
-    moderate_low_area = area(0.27, 0.439, data, 'Moderate-low severity')
-    moderate_high_area = area(0.44, 0.659, data, 'Moderate-high severity')
-    high_area = area(0.66, 1.3, data, 'High severity')
-
-# Prepare data for the graph
-severity_levels = ['Low severity', 'Moderate-low severity', 'Moderate-high severity', 'High severity']
-areas = [low_area, moderate_low_area, moderate_high_area, high_area]
-
-# Plotting the graphs
-
-# 1. Bar chart of areas for each burn severity level
-plot_bar_chart(severity_levels, areas)
-
-# 2. Histogram of pixel values in the burn severity map
-plot_histogram(data)
-
-# 3. Boxplot of pixel values for each severity range
-severity_ranges = [(0.1, 0.269), (0.27, 0.439), (0.44, 0.659), (0.66, 1.3)]
-plot_boxplot(data, severity_ranges)
-
-# Save the graphs to files
-plt.figure(figsize=(10, 6))
-plt.bar(severity_levels, areas, color=['blue', 'green', 'yellow', 'red'])
-plt.xlabel('Burn Severity Levels')
-plt.ylabel('Area (hectares)')
-plt.title('Area of Each Burn Severity Level')
-plt.tight_layout()
-plt.savefig(r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\burn_severity_area_graph.png')
-
-plt.figure(figsize=(10, 6))
-plt.hist(data.flatten(), bins=50, color='gray', edgecolor='black')
-plt.xlabel('Pixel Value')
-plt.ylabel('Frequency')
-plt.title('Histogram of Burn Severity Pixel Values')
-plt.tight_layout()
-plt.savefig(r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\burn_severity_histogram.png')
-
-plt.figure(figsize=(10, 6))
-plt.boxplot([data[(data >= low) & (data <= high)].flatten() for low, high in severity_ranges],
-            labels=['Low', 'Moderate-low', 'Moderate-high', 'High'])
-plt.xlabel('Burn Severity Levels')
-plt.ylabel('Pixel Value')
-plt.title('Boxplot of Burn Severity Pixel Values by Severity Level')
-plt.tight_layout()
-plt.savefig(r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\burn_severity_boxplot.png')
-
-print("Graphs have been saved as burn_severity_area_graph.png, burn_severity_histogram.png, and burn_severity_boxplot.png")
\ No newline at end of file
+    low_area = area(counts[0], 'Low severity')
+    moderate_low_area = area(counts[1], 'Moderate-low severity')
+    moderate_high_area = area(counts[2], 'Moderate-high severity')
+    high_area = area(counts[3], 'High severity')
+
+    # Prepare data for the graph
+    severity_levels = ['Low severity', 'Moderate-low severity', 'Moderate-high severity', 'High severity']
+    areas = [low_area, moderate_low_area, moderate_high_area, high_area]
+
+    # Plotting the graphs. Each helper returns its Figure so the same
+    # object is saved and shown without being rebuilt.
+
+    # 1. Bar chart of areas for each burn severity level
+    fig = plot_bar_chart(severity_levels, areas)
+    fig.savefig(r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\burn_severity_area_graph.png')
+
+    # 2. Histogram of pixel values in the burn severity map
+    # Bin the raster once and share the counts with the saved figure.
+    # The edges are scaled back to ΔNBR units for the axis.
+    hist_counts, hist_edges = numpy.histogram(data.ravel(), bins=50)
+    hist_edges = hist_edges / DNBR_SCALE
+    fig = plot_histogram(hist_counts, hist_edges)
+    fig.savefig(r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\burn_severity_histogram.png')
+
+    # 3. Boxplot of pixel values for each severity range
+    # Summarize each range once - matplotlib only needs the five statistics
+    stats = boxplot_stats(data, severity_ranges,
+                          ['Low', 'Moderate-low', 'Moderate-high', 'High'])
+    fig = plot_boxplot(stats)
+    fig.savefig(r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\burn_severity_boxplot.png')
+
+    print("Graphs have been saved as burn_severity_area_graph.png, burn_severity_histogram.png, and burn_severity_boxplot.png")
+
+    # Display all three graphs
+    plt.show()
+
+if __name__ == '__main__':
+
+    input_filename = r'C:\Users\ryanj\Desktop\COGS\code\portfolio\burn_severity_analysis\masked_burn_severity.tif'
+
+    # Open the masked burn severity raster file
+    with rasterio.open(input_filename) as burn_severity:
+        # Read data from the burn severity raster
+        data = burn_severity.read(1)
+
+    run(data)
\ No newline at end of file
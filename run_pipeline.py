@@ -0,0 +1,60 @@
+"""Run Pipeline"""
+
+__author__ = "Ryan Milia"
+
+""" Date: August 31, 2026
+    Description:
+    This module runs the full burn severity pipeline in memory.
+    - Calculates the burn severity band from Sentinel-2 imagery (1-burn_severity.py).
+    - Masks water from the burn severity band (2-masking_water.py).
+    - Calculates the area (Ha) of burn severity levels (3-area_calculation.py).
+    - Streams the band between the stages instead of writing and
+      re-reading the intermediate GeoTIFFs.
+    - Processes the raster in row strips so each strip flows through
+      delta NBR, masking, and binning while it is still in cache.
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+# Loads one of the numbered scripts (their names are not valid module names)
+def load_script(filename):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(filename)[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+burn_severity = load_script('1-burn_severity.py')
+masking_water = load_script('2-masking_water.py')
+area_calculation = load_script('3-area_calculation.py')
+
+# Number of raster rows processed per strip - 512 rows of float32 at the
+# full 10m width fit comfortably in the L2/L3 caches
+STRIP_ROWS = 512
+
+if __name__ == '__main__':
+
+    # Download the four Sentinel-2 bands
+    pre_nir, pre_swir, post_nir, post_swir, meta = burn_severity.fetch_bands()
+
+    # Build (or load the cached) water mask once at full size; 1 = keep
+    keep_mask = masking_water.build_mask(meta)
+    nodata = meta.get('nodata') or 0
+
+    # Flow each strip through delta NBR -> mask -> bin while the strip is
+    # still hot in cache, rather than walking the full raster per stage
+    masked = np.empty(pre_nir.shape, np.int16)
+    edges = np.array(area_calculation.severity_ranges, dtype=masked.dtype)
+    counts = np.zeros(len(area_calculation.severity_ranges), np.int64)
+    for row in range(0, pre_nir.shape[0], STRIP_ROWS):
+        strip = slice(row, min(row + STRIP_ROWS, pre_nir.shape[0]))
+        burn_severity._delta_nbr(pre_nir[strip], pre_swir[strip],
+                                 post_nir[strip], post_swir[strip],
+                                 masked[strip])
+        masked[strip][keep_mask[strip] == 0] = nodata
+        counts += area_calculation._bin_counts(masked[strip], edges)
+
+    # Calculate and plot the burn severity areas
+    area_calculation.run(masked, counts)